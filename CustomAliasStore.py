@@ -1,13 +1,35 @@
 # Python
 from __future__ import annotations
 
+import atexit
 import csv
+import logging
+import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
 
+try:
+    import fcntl  # POSIX only; used for advisory locking between bot instances
+except ImportError:
+    fcntl = None
 
-@dataclass(frozen=True)
+# How long added rows may sit in the in-memory queue before being written
+FLUSH_INTERVAL_S = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def _csv_escape(value: str) -> str:
+    # Minimal CSV quoting: only fields containing special characters need it
+    if any(ch in value for ch in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+@dataclass(frozen=True, slots=True)
 class AliasEntry:
     name: str
     alias: str
@@ -19,11 +41,18 @@ class CustomAliasStore:
     Name,Alias
     Colonizer Training Camp,CTC
     Asteroid Mining,Space Miner
+
+    The file is kept open in append mode; new rows are queued in memory and
+    written by a background timer shortly after being added, and fsynced on
+    close(). Rows only reach the file inside an exclusive flock, so
+    concurrent instances don't interleave.
     """
     def __init__(self, path: str | Path):
         self._path = Path(path)
         self._aliases_by_name: Dict[str, Set[str]] = {}
         self._seen_lower: Set[Tuple[str, str]] = set()  # (name_lower, alias_lower)
+        # Read-only snapshot handed out by all_aliases(); None when stale
+        self._frozen_view: Optional[Mapping[str, FrozenSet[str]]] = None
 
         # Ensure directory exists
         if self._path.parent and not self._path.parent.exists():
@@ -35,14 +64,30 @@ class CustomAliasStore:
 
         self._load_all()
 
+        self._lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        # Encoded CSV rows not yet written; bytes leave it only once written
+        self._pending = bytearray()
+        # Unbuffered: rows are batched in _pending, so every write goes straight out
+        self._fh = self._path.open("ab", buffering=0)
+        atexit.register(self.close)
+
     def _load_all(self) -> None:
         self._aliases_by_name.clear()
         self._seen_lower.clear()
+        self._frozen_view = None
         with self._path.open("r", encoding="utf-8", newline="") as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            header = next(reader, [])
+            idx = {col: i for i, col in enumerate(header)}
+            name_i, alias_i = idx.get("Name"), idx.get("Alias")
+            if name_i is None or alias_i is None:
+                return
             for row in reader:
-                name = (row.get("Name") or "").strip()
-                alias = (row.get("Alias") or "").strip()
+                if len(row) <= max(name_i, alias_i):
+                    continue
+                name = row[name_i].strip()
+                alias = row[alias_i].strip()
                 if not name or not alias:
                     continue
                 self._add_in_memory(name, alias)
@@ -53,32 +98,115 @@ class CustomAliasStore:
             return
         self._seen_lower.add(key)
         self._aliases_by_name.setdefault(name, set()).add(alias)
+        self._frozen_view = None
 
     def add_alias(self, name: str, alias: str) -> bool:
         """
         Adds alias to memory and file (append-only, no rewrite).
         Returns True if new, False if it was already present (case-insensitive).
         """
-        name_clean = name.strip()
-        alias_clean = alias.strip()
-        if not name_clean or not alias_clean:
-            return False
-
-        key = (name_clean.casefold(), alias_clean.casefold())
-        if key in self._seen_lower:
-            return False
+        return self.add_aliases([(name, alias)])[0]
 
-        # Append to file
-        with self._path.open("a", encoding="utf-8", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([name_clean, alias_clean])
-
-        # Update memory
-        self._add_in_memory(name_clean, alias_clean)
-        return True
+    def add_aliases(self, pairs: Iterable[Tuple[str, str]]) -> List[bool]:
+        """
+        Batch form of add_alias: one lock acquisition and one scheduled flush
+        for the whole batch. Returns an is-new flag per pair, in order.
+        """
+        out: List[bool] = []
+        with self._lock:
+            for name, alias in pairs:
+                name_clean = name.strip()
+                alias_clean = alias.strip()
+                key = (name_clean.casefold(), alias_clean.casefold())
+                if not name_clean or not alias_clean or key in self._seen_lower:
+                    out.append(False)
+                    continue
+                self._pending += f"{_csv_escape(name_clean)},{_csv_escape(alias_clean)}\n".encode("utf-8")
+                self._add_in_memory(name_clean, alias_clean)
+                out.append(True)
+            if any(out):
+                if self._fh.closed:
+                    # Already closed (e.g. at exit): no timer will flush, so
+                    # append synchronously; a failure propagates to the caller
+                    self._fh = self._path.open("ab", buffering=0)
+                    try:
+                        self._flush_locked()
+                        os.fsync(self._fh.fileno())
+                    finally:
+                        self._fh.close()
+                else:
+                    self._schedule_flush()
+        return out
 
-    def all_aliases(self) -> Dict[str, Set[str]]:
-        return {k: set(v) for k, v in self._aliases_by_name.items()}
+    def _schedule_flush(self) -> None:
+        # Caller holds self._lock
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_INTERVAL_S, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_locked(self) -> None:
+        # Caller holds self._lock; the flock guards against other processes.
+        # Only bytes that were actually written are dropped from _pending, so
+        # a failed write (ENOSPC, ...) keeps the rest for the next flush.
+        if not self._pending:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        try:
+            while self._pending:
+                written = self._fh.write(self._pending)
+                del self._pending[:written]
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+            if self._fh.closed:
+                return
+            try:
+                self._flush_locked()
+            except OSError:
+                # Runs on the timer thread: nobody else would see this
+                logger.exception("Failed to write %d pending alias bytes to %s; will retry on next flush",
+                                 len(self._pending), self._path)
+
+    def close(self) -> None:
+        """
+        Flush and fsync pending rows, then close the file.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._fh.closed:
+                return
+            try:
+                self._flush_locked()
+                os.fsync(self._fh.fileno())
+            except OSError:
+                logger.exception("Failed to write pending aliases to %s on close", self._path)
+            finally:
+                self._fh.close()
+
+    def __enter__(self) -> "CustomAliasStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def all_aliases(self) -> Mapping[str, FrozenSet[str]]:
+        """
+        Read-only view of name -> aliases. Rebuilt only after the store
+        changes, so repeated calls don't copy every alias set.
+        """
+        if self._frozen_view is None:
+            self._frozen_view = MappingProxyType(
+                {k: frozenset(v) for k, v in self._aliases_by_name.items()}
+            )
+        return self._frozen_view
 
     def entries(self) -> List[AliasEntry]:
         out: List[AliasEntry] = []
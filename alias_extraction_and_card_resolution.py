@@ -1,13 +1,14 @@
 import re
-import json
-from typing import List, Set
+from typing import List, Optional, Set
 
 from card_data_model import Card
+from card_index_manager import _norm_alias
 from formatCardHeading import format_card_heading
 
 # Match [ALIAS] but not markdown link text [text](url)
 # (?!\() ensures ']' isn't immediately followed by '('
-BRACKETED_ALIAS_RE = re.compile(r"\[([^\[\]\n]{1,40})\](?!\()")
+# (?!...https?://) rejects URL-like bracket contents inside the regex engine
+BRACKETED_ALIAS_RE = re.compile(r"\[(?![^\[\]\n]*?https?://)([^\[\]\n]{1,40})\](?!\()")
 
 
 def extract_aliases(body: str) -> List[str]:
@@ -16,50 +17,9 @@ def extract_aliases(body: str) -> List[str]:
     """
     if not body:
         return []
-    candidates = [m.group(1).strip() for m in BRACKETED_ALIAS_RE.finditer(body)]
-    # Filter out trivial tokens like empty strings or obvious non-alias noise
-    cleaned = []
-    for c in candidates:
-        # ignore tokens that look like URLs or markdown artifacts
-        if "http://" in c or "https://" in c:
-            continue
-        # keep reasonable tokens
-        if 1 <= len(c) <= 40:
-            cleaned.append(c)
-    return cleaned
-
-
-def _normalize_tags(raw_tags: List[str]) -> List[str]:
-    """
-    Normalize tags to a clean list of Title Cased strings.
-    Handles cases where tags might contain a single JSON-like array string.
-    """
-    if not raw_tags:
-        return []
-
-    # If it's a single JSON-like array string, parse it
-    if len(raw_tags) == 1:
-        s = (raw_tags[0] or "").strip()
-        if s.startswith("[") and s.endswith("]"):
-            try:
-                parsed = json.loads(s)
-                if isinstance(parsed, list):
-                    return [str(t).strip().strip('"').strip("'").title() for t in parsed if str(t).strip()]
-            except Exception:
-                pass  # fall through to generic handling
-
-    # Generic handling: split items that still contain brackets/commas
-    out: List[str] = []
-    for item in raw_tags:
-        if not item:
-            continue
-        text = str(item).strip().replace("[", "").replace("]", "").replace("\"", "")
-        # Split by comma and clean quotes/spaces
-        parts = [p.strip().strip('"').strip("'") for p in text.split(",")]
-        for p in parts:
-            if p:
-                out.append(p.title())
-    return out
+    # URL-like tokens are already excluded by the pattern; the regex caps the
+    # raw length at 40, so only whitespace-only captures need dropping here.
+    return [c for c in (m.strip() for m in BRACKETED_ALIAS_RE.findall(body)) if c]
 
 
 def format_card_reply(cards: List[Card], footer: str = "") -> str:
@@ -71,52 +31,52 @@ def format_card_reply(cards: List[Card], footer: str = "") -> str:
     - Print tags as comma-separated text in Title Case; skip if there are no tags.
     - Render the card name in bold (Reddit markdown).
     """
-    blocks: List[str] = []
+    # One flat list of pieces (separators included) and a single join at the end
+    parts: List[str] = []
     for c in cards:
-        sections: List[str] = []
+        if parts:
+            parts.append("\n\n----\n\n")  # separate cards clearly with a divider and double breaks
 
         # Card name (bold)
-        sections.append(f"Card: **{format_card_heading(c)}**")
+        parts.append(f"Card: **{format_card_heading(c)}**")
 
         # Cost handling
         cost_raw = (c.cost or "").strip()
         if cost_raw and cost_raw.lower() != "n/a":
-            cost_display = f"{cost_raw}MC" if cost_raw.isdigit() else cost_raw
-            sections.append(f"Cost: {cost_display}")
+            parts.append(f"\n\nCost: {cost_raw}MC" if cost_raw.isdigit() else f"\n\nCost: {cost_raw}")
 
         # Description
-        sections.append(f"Description: {c.description}")
-
-        # Tags: normalize and join
-        pretty_tags = _normalize_tags(list(c.tags or []))
-        if pretty_tags:
-            sections.append(f"Tags: {', '.join(pretty_tags)}")
+        parts.append(f"\n\nDescription: {c.description}")
 
-        # Join sections with double line breaks
-        blocks.append("\n\n".join(sections))
+        # Tags: display form is precomputed by the CSV loader
+        if c.tags_display:
+            parts.append(f"\n\nTags: {c.tags_display}")
 
-    reply = "\n\n----\n\n".join(blocks)  # separate cards clearly with a divider and double breaks
     if footer:
-        reply = f"{reply}\n\n{footer}"
-    return reply
+        parts.append(f"\n\n{footer}")
+    return "".join(parts)
 
 
-def resolve_cards_for_comment(text: str, lookup_fn) -> List[Card]:
+def resolve_cards_for_comment(text: str, lookup_fn, max_cards: Optional[int] = None) -> List[Card]:
     """
     From a comment text, extract aliases and resolve them to cards (deduped, in appearance order).
     lookup_fn: function(str) -> Card | None
+    max_cards: stop resolving once this many cards are found (no cap if None)
     """
     tokens = extract_aliases(text)
     seen: Set[str] = set()
     resolved: List[Card] = []
+    resolved_names: Set[str] = set()
     for tok in tokens:
-        key = " ".join(tok.strip().split()).upper()
+        if max_cards is not None and len(resolved) >= max_cards:
+            break
+        key = _norm_alias(tok)
         if key in seen:
             continue
         seen.add(key)
         card = lookup_fn(tok)
-        if card:
-            # Avoid duplicates if multiple aliases map to the same card
-            if all(card.name != c.name for c in resolved):
-                resolved.append(card)
+        # Avoid duplicates if multiple aliases map to the same card
+        if card and card.name not in resolved_names:
+            resolved.append(card)
+            resolved_names.add(card.name)
     return resolved
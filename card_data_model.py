@@ -1,8 +1,42 @@
+import json
 from dataclasses import dataclass
 from typing import List, Optional
 
 
-@dataclass(frozen=True)
+def _normalize_tags(raw_tags: List[str]) -> List[str]:
+    """
+    Normalize tags to a clean list of Title Cased strings.
+    Handles cases where tags might contain a single JSON-like array string.
+    """
+    if not raw_tags:
+        return []
+
+    # If it's a single JSON-like array string, parse it
+    if len(raw_tags) == 1:
+        s = (raw_tags[0] or "").strip()
+        if s.startswith("[") and s.endswith("]"):
+            try:
+                parsed = json.loads(s)
+                if isinstance(parsed, list):
+                    return [str(t).strip().strip('"').strip("'").title() for t in parsed if str(t).strip()]
+            except Exception:
+                pass  # fall through to generic handling
+
+    # Generic handling: split items that still contain brackets/commas
+    out: List[str] = []
+    for item in raw_tags:
+        if not item:
+            continue
+        text = str(item).strip().replace("[", "").replace("]", "").replace("\"", "")
+        # Split by comma and clean quotes/spaces
+        parts = [p.strip().strip('"').strip("'") for p in text.split(",")]
+        for p in parts:
+            if p:
+                out.append(p.title())
+    return out
+
+
+@dataclass(frozen=True, slots=True)
 class Card:
     name: str
     cost: str  # cost is a string in CSV
@@ -10,3 +44,9 @@ class Card:
     tags: List[str]
     aliases: List[str]
     number: Optional[str] = None  # optional: present if CSV has "Number"
+    tags_display: str = ""  # Title Cased, comma-joined tags; derived from tags if not given
+
+    def __post_init__(self) -> None:
+        # Computed once per card so reply formatting never re-normalizes tags
+        if not self.tags_display and self.tags:
+            object.__setattr__(self, "tags_display", ", ".join(_normalize_tags(self.tags)))
@@ -1,22 +1,54 @@
-from dataclasses import dataclass
-from typing import Dict, Iterable, Optional, List
+import functools
+import sys
+from dataclasses import dataclass, field
+from os.path import commonprefix
+from typing import Dict, Iterable, Optional, List, Tuple
 
 from card_data_model import Card
 
+try:
+    from rapidfuzz.distance import Levenshtein as _LV  # pip install rapidfuzz
+except ImportError:  # fall back to the pure-Python DP below
+    _LV = None
 
+# Bound on memoized lookup results per index (oldest entries evicted first)
+_LOOKUP_CACHE_SIZE = 4096
+_MISSING = object()
+
+
+@functools.lru_cache(maxsize=4096)
 def _norm_alias(s: str) -> str:
     """
     Normalize alias for case-insensitive lookup.
+    Memoized: chat traffic repeats the same tokens constantly.
     """
-    return " ".join(s.strip().split()).upper()
+    # Fast path for single-word tokens (short codes like "CTC"): nothing to collapse
+    if s.isalnum():
+        return s.upper()
+    # split() already drops leading/trailing whitespace; no separate strip() needed
+    return " ".join(s.split()).upper()
 
 
-def _levenshtein(a: str, b: str) -> int:
+def _levenshtein(a: str, b: str, score_cutoff: Optional[int] = None) -> int:
     """
-    Compute Levenshtein edit distance between two strings (iterative DP).
+    Compute Levenshtein edit distance between two strings.
+
+    Uses rapidfuzz's bit-parallel C implementation when available, otherwise
+    an iterative DP. If `score_cutoff` is given, any distance above it may be
+    reported as `score_cutoff + 1` so the computation can stop early.
     """
+    if _LV is not None:
+        return _LV.distance(a, b, score_cutoff=score_cutoff)
     if a == b:
         return 0
+    # A shared prefix/suffix never changes the distance; trim it with the
+    # C-level commonprefix so the DP only covers the differing middle
+    prefix = len(commonprefix((a, b)))
+    if prefix:
+        a, b = a[prefix:], b[prefix:]
+    suffix = len(commonprefix((a[::-1], b[::-1])))
+    if suffix:
+        a, b = a[:-suffix], b[:-suffix]
     if not a:
         return len(b)
     if not b:
@@ -33,24 +65,100 @@ def _levenshtein(a: str, b: str) -> int:
                     prev[j - 1] + cost  # substitution
                 )
             )
+        # Row minimum never decreases, so we can bail once it exceeds the cutoff
+        if score_cutoff is not None and min(curr) > score_cutoff:
+            return score_cutoff + 1
         prev = curr
     return prev[-1]
 
 
+class _BKTree:
+    """
+    Burkhard-Keller tree over alias keys, metric = Levenshtein distance.
+    Lets lookups visit only the keys that can be within a given radius
+    instead of scanning every alias. Keys are stored with their position
+    in the index so hits can be resolved without a dict probe.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        # node = (key, position, {edge_distance: child_node})
+        self._root: Optional[Tuple[str, int, Dict[int, tuple]]] = None
+        for pos, key in enumerate(keys):
+            self.add(key, pos)
+
+    def add(self, key: str, pos: int) -> None:
+        if self._root is None:
+            self._root = (key, pos, {})
+            return
+        node = self._root
+        while True:
+            node_key, _pos, children = node
+            d = _levenshtein(key, node_key)
+            if d == 0:
+                return
+            child = children.get(d)
+            if child is None:
+                children[d] = (key, pos, {})
+                return
+            node = child
+
+    def find(self, query: str, radius: int) -> List[Tuple[int, int]]:
+        """
+        Return (distance, position) for every key within `radius` of `query`.
+        """
+        if self._root is None:
+            return []
+        found: List[Tuple[int, int]] = []
+        qlen = len(query)
+        stack = [self._root]
+        while stack:
+            node_key, pos, children = stack.pop()
+            # Past radius + largest edge neither this node nor any child can match,
+            # so the exact distance beyond that bound is irrelevant.
+            bound = radius + max(children, default=0)
+            # Length difference is a lower bound on the distance: skip the DP
+            # entirely when it already exceeds the bound.
+            if abs(qlen - len(node_key)) > bound:
+                continue
+            d = _levenshtein(query, node_key, score_cutoff=bound)
+            if d <= radius:
+                found.append((d, pos))
+            # Triangle inequality: only subtrees with edge in [d-r, d+r] can match
+            lo, hi = d - radius, d + radius
+            for edge, child in children.items():
+                if lo <= edge <= hi:
+                    stack.append(child)
+        return found
+
+
 @dataclass
 class CardIndex:
     by_alias: Dict[str, Card]
     by_name: Dict[str, Card]
+    _tree: _BKTree = field(init=False, repr=False, compare=False)
+    # Per key position: (tie-break bits of the packed score, card)
+    _alias_items: List[Tuple[int, Card]] = field(init=False, repr=False, compare=False)
+    _lookup_cache: Dict[str, Optional[Card]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._lookup_cache = {}
+        self._tree = _BKTree(self.by_alias)
+        # Longer keys win ties, then earlier ones; precomputed once per key
+        self._alias_items = [
+            (((0xFFFF - min(len(key), 0xFFFF)) << 24) | pos, card)
+            for pos, (key, card) in enumerate(self.by_alias.items())
+        ]
 
     @classmethod
     def build(cls, cards: Iterable[Card]) -> "CardIndex":
         alias_map: Dict[str, Card] = {}
         name_map: Dict[str, Card] = {}
         for c in cards:
-            name_key = _norm_alias(c.name)
+            # Intern keys so dict probes on them can short-circuit on identity
+            name_key = sys.intern(_norm_alias(c.name))
             name_map[name_key] = c
             for alias in c.aliases:
-                key = _norm_alias(alias)
+                key = sys.intern(_norm_alias(alias))
                 alias_map.setdefault(key, c)
             # also allow exact name lookups via alias map
             alias_map.setdefault(name_key, c)
@@ -62,11 +170,10 @@ class CardIndex:
 
         Strategy:
         - Exact match returns immediately.
-        - Otherwise, compute Levenshtein distance between the normalized
-          query and every alias/name key.
-        - Pick the key with the smallest distance.
-        - Accept only if the distance is within a reasonable threshold
-          (max(2, len(query)//3)) to avoid wild mismatches.
+        - Otherwise, query the BK-tree for alias/name keys within the
+          accepted threshold (max(2, len(query)//2)) of the normalized query.
+        - Pick the key with the smallest distance, preferring the longer key
+          on ties (then the earlier one in index order).
         """
         if not token:
             return None
@@ -77,21 +184,26 @@ class CardIndex:
         if exact:
             return exact
 
-        best_key: Optional[str] = None
-        best_dist = 10**9
-
-        for key in self.by_alias.keys():
-            d = _levenshtein(norm_tok, key)
-            if d < best_dist or (d == best_dist and len(key) > len(best_key or "")):
-                best_dist = d
-                best_key = key
-
-        if best_key is None:
-            return None
-
+        # The index is immutable after build, so fuzzy results (misses included)
+        # can be memoized per normalized token
+        cached = self._lookup_cache.get(norm_tok, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        card = self._fuzzy_lookup(norm_tok)
+        if len(self._lookup_cache) >= _LOOKUP_CACHE_SIZE:
+            del self._lookup_cache[next(iter(self._lookup_cache))]
+        self._lookup_cache[norm_tok] = card
+        return card
+
+    def _fuzzy_lookup(self, norm_tok: str) -> Optional[Card]:
         # Guardrail: require “close enough” distance
         max_allowed = max(2, len(norm_tok) // 2)
-        if best_dist <= max_allowed:
-            return self.by_alias.get(best_key)
+        candidates = self._tree.find(norm_tok, max_allowed)
+        if not candidates:
+            return None
 
-        return None
+        # Rank candidates by (distance, longer key first, index order) packed into
+        # one int, so min() does plain int compares instead of building tuples.
+        items = self._alias_items
+        best = min((d << 40) | items[pos][0] for d, pos in candidates)
+        return items[best & 0xFFFFFF][1]
@@ -1,15 +1,19 @@
 import csv
 import logging
 import json
+import re
 from pathlib import Path
 from typing import Iterable, List
 
 from card_data_model import Card
 
-# Enable DEBUG logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# Separators for non-JSON multi-value fields
+_SPLIT_RE = re.compile(r"[,|]")
+# Reused decoder; raw_decode skips the json.loads wrapper
+_JSON_DECODER = json.JSONDecoder()
+
 
 def _split_multi(value: str) -> List[str]:
     """
@@ -20,24 +24,24 @@ def _split_multi(value: str) -> List[str]:
         return []
 
     s = value.strip()
-    # Try to parse JSON-style arrays first
-    if s.startswith("[") and s.endswith("]"):
+    # Try to parse JSON-style arrays first; anything not starting with "[" goes
+    # straight to the split fallback without touching the decoder
+    if s[:1] == "[" and s[-1] == "]":
         try:
-            data = json.loads(s)
-            if isinstance(data, list):
+            data, end = _JSON_DECODER.raw_decode(s)
+            if end == len(s) and isinstance(data, list):
                 return [str(item).strip() for item in data if str(item).strip()]
         except Exception:
             logger.debug("Failed to parse JSON array from value: %r; falling back to split", value)
 
-    # Fallback: split by comma/pipe
-    parts: List[str] = []
-    for chunk in value.replace("|", ",").split(","):
-        token = chunk.strip().strip('"').strip("'").strip()
-        # Also trim any stray leading/trailing brackets from non-JSON cases
-        token = token.lstrip("[").rstrip("]")
-        if token:
-            parts.append(token)
-    return parts
+    # Fallback: split by comma/pipe; trim (Unicode) whitespace and quotes, then
+    # stray brackets from non-JSON cases, then any whitespace they wrapped
+    return [
+        t for t in (
+            chunk.strip().strip('"').strip("'").strip().lstrip("[").rstrip("]").strip()
+            for chunk in _SPLIT_RE.split(value)
+        ) if t
+    ]
 
 
 def load_cards_from_csv(csv_path: str | Path) -> List[Card]:
@@ -48,29 +52,40 @@ def load_cards_from_csv(csv_path: str | Path) -> List[Card]:
         raise FileNotFoundError(f"Cards CSV not found: {path}")
     cards: List[Card] = []
     with path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+        # Plain csv.reader + cached column positions: no per-row dict like DictReader
+        reader = csv.reader(f)
+        header = next(reader, [])
+        idx = {col: i for i, col in enumerate(header)}
         required = {"Name", "Cost", "Description", "Tags", "Aliases"}
-        missing = required - set(reader.fieldnames or [])
+        missing = required - set(idx)
         if missing:
             logger.error("CSV missing required columns: %s", missing)
             raise ValueError(f"CSV missing required columns: {missing}")
 
-        has_number = "Number" in (reader.fieldnames or [])
+        width = len(header)
+        name_i, cost_i, desc_i = idx["Name"], idx["Cost"], idx["Description"]
+        tags_i, aliases_i = idx["Tags"], idx["Aliases"]
+        number_i = idx.get("Number")
 
+        # Per-row debug logging is costly; decide once whether it is on
+        debug = logger.isEnabledFor(logging.DEBUG)
         for i, row in enumerate(reader, start=2):  # start=2 accounts for header line
+            if not row:
+                continue  # blank line (DictReader skipped these too)
             try:
-                name = (row["Name"] or "").strip()
-                cost = (row["Cost"] or "").strip()  # keep cost as string
-                description = (row["Description"] or "").strip()
-                tags = _split_multi(row.get("Tags", ""))
-                aliases = _split_multi(row.get("Aliases", ""))
-                number = (row["Number"].strip() if has_number and row.get("Number") is not None else None)
+                if len(row) < width:
+                    row += [""] * (width - len(row))
+                name = row[name_i].strip()
+                cost = row[cost_i].strip()  # keep cost as string
+                description = row[desc_i].strip()
+                tags = _split_multi(row[tags_i])
+                aliases = _split_multi(row[aliases_i])
+                number = row[number_i].strip() if number_i is not None else None
 
                 if not name:
-                    logger.debug("Skipping row %d: empty name", i)
+                    if debug:
+                        logger.debug("Skipping row %d: empty name", i)
                     continue
-                tags = [t.strip() for t in tags if t.strip()]
-                aliases = [a.strip() for a in aliases if a.strip()]
                 cards.append(Card(
                     name=name,
                     cost=cost,
@@ -79,15 +94,16 @@ def load_cards_from_csv(csv_path: str | Path) -> List[Card]:
                     aliases=aliases,
                     number=number or None,
                 ))
-                logger.debug(
-                    "Loaded card '%s' (cost=%s, tags=%d, aliases=%d%s) from row %d",
-                    name,
-                    cost,
-                    len(tags),
-                    len(aliases),
-                    f', number="{number}"' if number else "",
-                    i,
-                )
+                if debug:
+                    logger.debug(
+                        "Loaded card '%s' (cost=%s, tags=%d, aliases=%d%s) from row %d",
+                        name,
+                        cost,
+                        len(tags),
+                        len(aliases),
+                        f', number="{number}"' if number else "",
+                        i,
+                    )
             except Exception:
                 logger.exception("Skipping malformed row %d due to parse error", i)
                 continue
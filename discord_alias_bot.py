@@ -1,11 +1,14 @@
 # Python
+from __future__ import annotations
+
 import asyncio
 import logging
-import tomllib
+import re
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from typing import TYPE_CHECKING, Optional, List, Tuple
 
-import discord  # pip install -U "discord.py>=2.3"
+if TYPE_CHECKING:
+    import discord
 
 from discord_alias_responder_module import DiscordAliasResponder
 from custom_alias_store import CustomAliasStore
@@ -14,6 +17,24 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(nam
 logger = logging.getLogger("discord-daemon")
 
 
+def _discord():
+    # discord.py is a heavy import (aiohttp, websockets, voice); only pay for it
+    # when a bot is actually created, not when importing config/parsing helpers
+    import discord  # pip install -U "discord.py>=2.3"
+    return discord
+
+
+# Patterns used when parsing alias-teaching replies, compiled once
+_ALIAS_PREFIX_RE = re.compile(r"alias:", re.IGNORECASE)
+# Card-name heuristics for a bot reply, as one alternation (first match wins):
+#   csv:  first line "#123,Name,..."   bold: first line "**Name**:"   name: any "Name: X" line
+_HEAD_RE = re.compile(
+    r"\A(?:#?\d{1,4}[ \t]*,[ \t]*(?P<csv>[^,\n]*)|\*{2}(?P<bold>.+?)\*{2}[ \t]*:)"
+    r"|^name[ \t]*:[ \t]*(?P<name>.+)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
 @dataclass(frozen=True)
 class DiscordConfig:
     token: str
@@ -27,6 +48,7 @@ class DiscordConfig:
 
 
 def load_config(path: str = "config.toml") -> DiscordConfig:
+    import tomllib
     with open(path, "rb") as f:
         data = tomllib.load(f)
     dcfg = data["discord"]
@@ -61,7 +83,7 @@ def _extract_alias_specs(msg_text: str) -> List[Tuple[Optional[str], str]]:
     out: List[Tuple[Optional[str], str]] = []
     for raw_line in msg_text.splitlines():
         line = raw_line.strip()
-        if not line.lower().startswith("alias:"):
+        if not _ALIAS_PREFIX_RE.match(line):
             continue
         body = line[len("alias:"):].strip()
         # Try explicit "Card | Alias" first
@@ -83,59 +105,57 @@ def _guess_single_card_name_from_text(text: str) -> Optional[str]:
     """
     Tries to extract a single card name from the bot's message text.
     This should work if the bot replied with exactly one card block.
-    Heuristics:
+    Heuristics (single regex pass; the earliest match in the text wins):
       - CSV-style first line: "#123,Name," or "Number,Name,..." -> take the token after first comma
+      - A bold header like "**Name**:" on the first line -> take text inside (best effort)
       - A line starting with "Name:" -> take the remainder
-      - A bold header like "**Name**:" -> take text inside (best effort)
     """
-    import re
-
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     if not lines:
         return None
 
-    # Heuristic 1: CSV-ish first data line like "#001,Colonizer Training Camp,..."
-    first = lines[0]
-    if "," in first:
-        parts = [p.strip() for p in first.split(",")]
-        if len(parts) >= 2:
-            # If the first part looks like a card number tag, take the second as name
-            if re.fullmatch(r"#?\d{1,4}", parts[0]):
-                maybe_name = parts[1]
-                return maybe_name or None
-
-    # Heuristic 2: look for "Name: X"
-    for ln in lines[:5]:
-        m = re.match(r"(?i)name\s*:\s*(.+)$", ln)
-        if m:
-            return m.group(1).strip()
-
-    # Heuristic 3: bold header "**X**:" at top
-    m = re.match(r"^\*{2}(.+?)\*{2}\s*:\s*", first)
-    if m:
-        return m.group(1).strip()
-
-    return None
+    # Only the top of the message is considered
+    m = _HEAD_RE.search("\n".join(lines[:5]))
+    if not m:
+        return None
+    return (m.group("csv") or m.group("bold") or m.group("name") or "").strip() or None
 
 
-class AliasBot(discord.Client):
+class AliasBot:
+    """
+    Wraps a discord.Client (created lazily, see _discord) and registers this
+    object's on_ready/on_message as its event handlers. Client attributes such
+    as user, get_channel and start are reachable directly on the bot.
+    """
     def __init__(self, conf: DiscordConfig, responder: DiscordAliasResponder, alias_store: CustomAliasStore):
+        discord = _discord()
         intents = discord.Intents.default()
         intents.message_content = True  # required to read message content
-        super().__init__(intents=intents)
+        self._client = discord.Client(intents=intents)
+        self._client.event(self.on_ready)
+        self._client.event(self.on_message)
         self.conf = conf
         self.responder = responder
         self.alias_store = alias_store
+        # Optional responder hook, resolved once instead of hasattr() per alias
+        self._register_alias = getattr(responder, "register_custom_alias", None)
 
         # Apply all known custom aliases to the responder if it supports it
         self._push_all_custom_aliases_to_responder()
 
+    def __getattr__(self, name: str):
+        # Delegate everything else (user, get_channel, start, ...) to the client
+        client = self.__dict__.get("_client")
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
+
     def _push_all_custom_aliases_to_responder(self):
-        if hasattr(self.responder, "register_custom_alias"):
+        if self._register_alias:
             for name, aliases in self.alias_store.all_aliases().items():
                 for alias in aliases:
                     try:
-                        self.responder.register_custom_alias(name, alias)  # type: ignore[attr-defined]
+                        self._register_alias(name, alias)
                     except Exception:
                         logger.exception("Failed applying custom alias %r -> %r to responder", name, alias)
 
@@ -147,6 +167,7 @@ class AliasBot(discord.Client):
                            self.conf.channel_id)
 
     async def on_message(self, message: discord.Message):
+        discord = _discord()
         try:
             if message.author.id == self.user.id:
                 return
@@ -161,15 +182,12 @@ class AliasBot(discord.Client):
                 return
 
             # 2) Normal flow: use the responder to answer queries
-            reply = self.responder.handle_message(message.content)
+            reply = self.responder.handle_message(
+                message.content, max_results=self.conf.max_cards_per_message
+            )
             if not reply:
                 return
 
-            blocks = [b for b in reply.split("\n\n") if b.strip()]
-            if len(blocks) > self.conf.max_cards_per_message:
-                blocks = blocks[: self.conf.max_cards_per_message]
-                reply = "\n\n".join(blocks)
-
             if self.conf.dry_run:
                 logger.info("[DRY RUN] Would reply to #%s (%s):\n%s",
                             message.channel, message.id, reply)
@@ -183,6 +201,7 @@ class AliasBot(discord.Client):
             logger.exception("Unexpected error in on_message")
 
     async def _handle_alias_reply(self, message: discord.Message):
+        discord = _discord()
         # Ensure the reply references one of our bot messages
         ref = message.reference
         if not ref:
@@ -212,27 +231,32 @@ class AliasBot(discord.Client):
         added_count = 0
         errors: List[str] = []
 
+        resolved_specs: List[Tuple[str, str]] = []
         for maybe_name, alias in alias_specs:
             name = maybe_name or inferred_name
             if not name:
                 errors.append(f'Could not determine card name for alias "{alias}". '
                               f'Use: Alias: Card Name | {alias}')
                 continue
+            resolved_specs.append((name, alias))
 
-            # Persist to CSV
-            try:
-                is_new = self.alias_store.add_alias(name, alias)
-                # Push to responder if supported for immediate effect
-                if hasattr(self.responder, "register_custom_alias"):
-                    try:
-                        self.responder.register_custom_alias(name, alias)  # type: ignore[attr-defined]
-                    except Exception:
-                        logger.exception("Responder rejected alias %r -> %r", name, alias)
-                if is_new:
-                    added_count += 1
-            except Exception:
-                logger.exception("Failed to add alias %r -> %r", name, alias)
-                errors.append(f'Failed to save alias "{alias}" for "{name}".')
+        # Persist to CSV off the event loop as a single batch
+        try:
+            results = await asyncio.to_thread(self.alias_store.add_aliases, resolved_specs)
+        except Exception:
+            logger.exception("Failed to add aliases %r", resolved_specs)
+            errors.extend(f'Failed to save alias "{alias}" for "{name}".' for name, alias in resolved_specs)
+            resolved_specs, results = [], []
+
+        for (name, alias), is_new in zip(resolved_specs, results):
+            # Push to responder if supported for immediate effect
+            if self._register_alias:
+                try:
+                    self._register_alias(name, alias)
+                except Exception:
+                    logger.exception("Responder rejected alias %r -> %r", name, alias)
+            if is_new:
+                added_count += 1
 
         # Acknowledge to the user
         if self.conf.dry_run:
@@ -247,17 +271,19 @@ class AliasBot(discord.Client):
         if not feedback:
             feedback.append("No new aliases added (duplicates ignored).")
 
-        try:
-            await message.add_reaction("👍")
-        except Exception:
-            pass
-
-        try:
-            await message.reply("\n".join(feedback), mention_author=False)
-        except Exception:
-            logger.debug("Could not send feedback message for alias addition.")
+        # Reaction and reply are independent round-trips; send them concurrently
+        react_result, reply_result = await asyncio.gather(
+            message.add_reaction("👍"),
+            message.reply("\n".join(feedback), mention_author=False),
+            return_exceptions=True,
+        )
+        if isinstance(react_result, BaseException):
+            logger.debug("Could not add reaction for alias addition: %r", react_result)
+        if isinstance(reply_result, BaseException):
+            logger.debug("Could not send feedback message for alias addition: %r", reply_result)
 
     async def start_with_reconnect(self, token: str):
+        discord = _discord()
         while True:
             try:
                 await self.start(token)
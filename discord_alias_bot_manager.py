@@ -1,12 +1,14 @@
 # Python
+from __future__ import annotations
+
 import asyncio
 import logging
 import os
-import tomllib
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
 
-import discord
+if TYPE_CHECKING:
+    import discord
 
 from discord_alias_responder_module import DiscordAliasResponder
 
@@ -19,6 +21,12 @@ logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.DEBUG),
                     format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
 
 
+def _discord():
+    # discord.py is a heavy import; defer it until a bot is actually created
+    import discord
+    return discord
+
+
 @dataclass(frozen=True)
 class DiscordConfig:
     token: str
@@ -36,6 +44,7 @@ class DiscordConfig:
 
 
 def load_config(path: str = "config.toml") -> DiscordConfig:
+    import tomllib
     with open(path, "rb") as f:
         data = tomllib.load(f)
     dcfg = data["discord"]
@@ -64,15 +73,30 @@ def load_config(path: str = "config.toml") -> DiscordConfig:
     )
 
 
-class AliasBot(discord.Client):
+class AliasBot:
+    """
+    Wraps a discord.Client (created lazily, see _discord) and registers this
+    object's on_ready/on_message as its event handlers. Client attributes such
+    as user, guilds and start are reachable directly on the bot.
+    """
     def __init__(self, conf: DiscordConfig, responder: DiscordAliasResponder):
+        discord = _discord()
         intents = discord.Intents.default()
         intents.message_content = True  # required to read message content for [[...]]
-        super().__init__(intents=intents)
+        self._client = discord.Client(intents=intents)
+        self._client.event(self.on_ready)
+        self._client.event(self.on_message)
         self.conf = conf
         self.responder = responder
         self._allow = set(conf.channel_allowlist or [])
 
+    def __getattr__(self, name: str):
+        # Delegate everything else (user, guilds, start, ...) to the client
+        client = self.__dict__.get("_client")
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
+
     async def on_ready(self):
         logger.info("Logged in as %s (id=%s)", self.user, getattr(self.user, "id", "?"))
         if self.conf.guild_id:
@@ -88,6 +112,7 @@ class AliasBot(discord.Client):
             logger.warning("No guild_id or channel_id configured; bot will ignore all messages.")
 
     async def on_message(self, message: discord.Message):
+        discord = _discord()
         try:
             if message.author.id == self.user.id:
                 return
@@ -108,15 +133,13 @@ class AliasBot(discord.Client):
                 # Nothing configured to monitor
                 return
 
-            reply = self.responder.handle_message(message.content)
+            # Safety cap is applied while resolving, so extra cards are never formatted
+            reply = self.responder.handle_message(
+                message.content, max_results=self.conf.max_cards_per_message
+            )
             if not reply:
                 return
 
-            # Optional safety cap
-            blocks = [b for b in reply.split("\n\n") if b.strip()]
-            if len(blocks) > self.conf.max_cards_per_message:
-                reply = "\n\n".join(blocks[: self.conf.max_cards_per_message])
-
             if self.conf.dry_run:
                 logger.info("[DRY RUN] Would reply in #%s (%s)\n%s", message.channel, message.id, reply)
                 return
@@ -129,6 +152,7 @@ class AliasBot(discord.Client):
             logger.exception("Unexpected error in on_message")
 
     async def start_with_reconnect(self, token: str):
+        discord = _discord()
         while True:
             try:
                 await self.start(token)
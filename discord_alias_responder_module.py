@@ -1,42 +1,51 @@
 # Python
 import logging
 import re
-from dataclasses import dataclass
-from typing import List, Optional, Iterable
-from urllib.parse import quote
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Iterable
 
 from card_loader_from_csv import load_cards_from_csv
 from card_index_manager import CardIndex
 from card_data_model import Card
+from formatCardHeading import format_card_heading
 
 
-TRIGGER_RE = re.compile(r"\[\[([^\[\]]+)\]\]")
+# Bounded so an unterminated "[[aaaa..." can't make the engine walk the whole message
+TRIGGER_RE = re.compile(r"\[\[([^\[\]]{1,80})\]\]")
+# Discord caps messages at 4000 chars; anything longer isn't scanned past this
+MAX_MESSAGE_CHARS = 4096
+
+# Fallback list parsing: sentence detection, list separators
+_SENTENCE_RE = re.compile(r"[.!?]\s|^\w+\s+\w+\s+\w+")
+_SPLIT_RE = re.compile(r"[,\|/\n]+")
+_SEP_SET = frozenset(",|/\n")
+_URL_RE = re.compile(r"https?://")
 
 logger = logging.getLogger(__name__)
 
 # Basic sanitization for Discord to avoid accidental pings and formatting breaks
+_ESCAPE_TABLE = str.maketrans({
+    "@": "@\u200b",  # stop mentions
+    "`": "'",        # avoid code fence breaks
+})
+# Same mention guard for log output, plus newlines kept on one log line
+_LOG_ESCAPE_TABLE = str.maketrans({"@": "@\u200b", "\n": "\\n"})
+
 def _escape_discord(s: str) -> str:
-    return (
-        s.replace("@", "@\u200b")  # stop mentions
-         .replace("`", "'")        # avoid code fence breaks
-    )
+    return s.translate(_ESCAPE_TABLE)
+
+# Deletes stray JSON-array characters from formatted tags
+_TAG_STRIP = str.maketrans("", "", '[]"')
 
 def _format_tags(tags: Iterable[str]) -> str:
     # ["building", "power"] -> "Building, Power"
     pretty = [t.replace("_", " ").strip().title() for t in tags if t and t.strip()]
-    return ", ".join(pretty).replace("[", "").replace("]", "").replace("\"", "")
-
-def _format_heading(card: Card) -> str:
-    # If card.number exists, link the heading; otherwise show plain name
-    number = getattr(card, "number", None)
-    name = _escape_discord(card.name)
-    if number:
-        return f"[{name}](https://ssimeonoff.github.io/cards-list{number})"
-    return name
+    return ", ".join(pretty).translate(_TAG_STRIP)
 
 def _format_card_for_discord(card: Card) -> str:
     # Keep it concise and Discord-friendly
-    heading = _format_heading(card)
+    # Linked when card.number exists; same heading as the Reddit replies
+    heading = format_card_heading(card, _escape_discord(card.name))
     cost = _escape_discord(card.cost)
     tags = _format_tags(card.tags)
     desc = _escape_discord(card.description)
@@ -55,6 +64,22 @@ def _format_card_for_discord(card: Card) -> str:
 class DiscordAliasResponder:
     index: CardIndex
     reply_footer: str = ""
+    # Formatted block per card, keyed by id(card); the index keeps every card
+    # alive as long as this responder, so ids can't be recycled underneath it
+    _formatted: Dict[int, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Cards are static after load: format every reachable card once at startup
+        # so replies only ever hit the cache
+        self._formatted = {}
+        for card in self.index.by_alias.values():
+            self._format(card)
+
+    def _format(self, card: Card) -> str:
+        out = self._formatted.get(id(card))
+        if out is None:
+            out = self._formatted[id(card)] = _format_card_for_discord(card)
+        return out
 
     @classmethod
     def from_csv(cls, csv_path: str, reply_footer: str = "") -> "DiscordAliasResponder":
@@ -73,11 +98,14 @@ class DiscordAliasResponder:
         separated by commas/pipes/newlines (e.g., 'Livestock, Steak').
         """
         raw = message or ""
-        # Primary: [[...]] triggers
-        tokens = [m.group(1).strip() for m in TRIGGER_RE.finditer(raw) if m.group(1).strip()]
-        if tokens:
-            logger.debug("extract_triggers: bracketed tokens=%r", tokens)
-            return tokens
+        # Primary: [[...]] triggers. Most chat has no "[[" at all, and a
+        # substring check is far cheaper than running the regex.
+        if "[[" in raw:
+            # findall with one group returns plain strings; strip each only once
+            tokens = [t for t in (c.strip() for c in TRIGGER_RE.findall(raw)) if t]
+            if tokens:
+                logger.debug("extract_triggers: bracketed tokens=%r", tokens)
+                return tokens
 
         # Fallback: parse simple lists only if the message looks like a token list
         fb = DiscordAliasResponder._extract_fallback_token_list(raw)
@@ -108,13 +136,12 @@ class DiscordAliasResponder:
             return []
 
         # If there are no obvious list separators and the text looks like a sentence, abort
-        has_separators = any(sep in text for sep in (",", "|", "/", "\n"))
-        looks_like_sentence = bool(re.search(r"[.!?]\s|^\w+\s+\w+\s+\w+", text))
-        if not has_separators and looks_like_sentence:
+        has_separators = not _SEP_SET.isdisjoint(text)
+        if not has_separators and _SENTENCE_RE.search(text):
             logger.debug("fallback: text looks like sentence without separators; skipping")
             return []
 
-        parts = [p.strip() for p in re.split(r"[,\|/\n]+", text) if p.strip()]
+        parts = [p for p in (p.strip() for p in _SPLIT_RE.split(text)) if p]
         logger.debug("fallback: split parts(raw)=%r", parts)
 
         if not (1 <= len(parts) <= 8):
@@ -123,7 +150,7 @@ class DiscordAliasResponder:
 
         cleaned: List[str] = []
         for p in parts:
-            if "http://" in p or "https://" in p:
+            if _URL_RE.search(p):
                 logger.debug("fallback: dropping URL-like part: %r", p)
                 continue
             if not (1 <= len(p) <= 60):
@@ -136,21 +163,29 @@ class DiscordAliasResponder:
 
     @staticmethod
     def _log_sanitized(prefix: str, text: str) -> None:
+        # Sanitizing scans the whole text; don't pay for it unless DEBUG is on
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         if text is None:
             logger.debug("%s <none>", prefix)
             return
-        safe = text.replace("@", "@\u200b").replace("\n", "\\n")
+        safe = text.translate(_LOG_ESCAPE_TABLE)
         if len(safe) > 300:
             safe = safe[:300] + "...<truncated>"
         logger.debug("%s %s", prefix, safe)
 
-    def handle_message(self, message: str) -> Optional[str]:
+    def handle_message(self, message: str, max_results: Optional[int] = None) -> Optional[str]:
         """
         Given a Discord message, returns a reply string if any triggers are found.
         Triggers: [[...]] or, if none, a conservative fallback list like 'A, B, C'.
+        At most `max_results` cards are resolved and formatted (no cap if None).
         """
         self._log_sanitized("Incoming message:", message)
 
+        if message and len(message) > MAX_MESSAGE_CHARS:
+            logger.debug("Truncating oversized message (%d chars)", len(message))
+            message = message[:MAX_MESSAGE_CHARS]
+
         tokens = self.extract_triggers(message)
         logger.debug("Extracted tokens: %s", tokens)
 
@@ -158,19 +193,22 @@ class DiscordAliasResponder:
             logger.debug("No tokens found; skipping reply")
             return None
 
-        seen = set()
+        # Case-insensitive dedup in one pass, keeping first-appearance order
+        # (lookups are case-insensitive, so which spelling survives is irrelevant)
+        deduped = list({t.casefold(): t for t in tokens}.values())
+        if len(deduped) != len(tokens):
+            logger.debug("Dropped %d duplicate token(s)", len(tokens) - len(deduped))
+
         results: List[str] = []
 
-        for tok in tokens:
-            key = tok.upper()
-            if key in seen:
-                logger.debug("Skipping duplicate token: %r", tok)
-                continue
-            seen.add(key)
+        for tok in deduped:
+            if max_results is not None and len(results) >= max_results:
+                logger.debug("Reached max_results=%d; ignoring remaining tokens", max_results)
+                break
             card = self._lookup(tok)
             if card:
                 logger.debug("Resolved token %r -> card '%s'", tok, card.name)
-                results.append(_format_card_for_discord(card))
+                results.append(self._format(card))
             else:
                 logger.debug("No match for token: %r", tok)
 
@@ -178,8 +216,9 @@ class DiscordAliasResponder:
             logger.debug("No cards resolved; skipping reply")
             return None
 
-        body = "\n\n".join(results)
-        footer = f"\n\n{self.reply_footer}" if self.reply_footer else ""
-        reply = f"{body}{footer}"
+        # Footer is just one more block: a single join builds the whole reply
+        if self.reply_footer:
+            results.append(self.reply_footer)
+        reply = "\n\n".join(results)
         self._log_sanitized("Composed reply:", reply)
         return reply
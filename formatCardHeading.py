@@ -1,10 +1,27 @@
 # Python
+import re
+from typing import Optional
 from urllib.parse import quote
 
-def format_card_heading(card) -> str:
+_URL_PREFIX = "https://ssimeonoff.github.io/cards-list#"
+# Card numbers are normally short and URL-safe ("#001"); only quote the odd one out
+_SAFE_NUM = re.compile(r"[\w-]+", re.ASCII)
+
+def card_url(number: str) -> str:
+    """
+    Link to a card on the cards list, e.g. "#001" -> ".../cards-list#001".
+    """
+    frag = str(number).lstrip("#")
+    if not _SAFE_NUM.fullmatch(frag):
+        frag = quote(frag, safe="")
+    return _URL_PREFIX + frag
+
+def format_card_heading(card, name: Optional[str] = None) -> str:
     """
     Returns the heading text; if card.number exists, link to the specified URL.
+    `name` overrides the displayed text (e.g. an escaped card name).
     """
-    if getattr(card, "number", None):
-        return f"[{card.name}](https://ssimeonoff.github.io/cards-list{card.number})"
-    return card.name
+    text = card.name if name is None else name
+    if card.number:
+        return f"[{text}]({card_url(card.number)})"
+    return text
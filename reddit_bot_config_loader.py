@@ -1,10 +1,11 @@
 import os
-import tomllib
+import pickle
 import logging
 from dataclasses import dataclass
 
-# Enable DEBUG logging by default
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+# Log level from TMARS_LOG_LEVEL (default INFO)
+LOG_LEVEL = os.environ.get("TMARS_LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
 logger = logging.getLogger(__name__)
 
 
@@ -44,9 +45,79 @@ def _redact(value: str, keep: int = 2) -> str:
     return value[:keep] + "..." + "*" * max(0, len(value) - keep - 3)
 
 
+def _cache_key(st: os.stat_result) -> tuple:
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_cached_config(cache_path: str, key: tuple) -> AppConfig | None:
+    """
+    Return the pickled AppConfig if it was written for the same TOML file
+    version (mtime + size), else None.
+
+    Unpickling runs arbitrary code, so the cache is only trusted when it is
+    owned by the current user and not group/world-writable (never on
+    platforms without uids).
+    """
+    getuid = getattr(os, "getuid", None)
+    if getuid is None:
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_uid != getuid() or st.st_mode & 0o022:
+                logger.warning("Ignoring config cache %s: not owned by this user or writable by others", cache_path)
+                return None
+            cached_key, app_cfg = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.debug("Ignoring unreadable config cache %s", cache_path, exc_info=True)
+        return None
+    if cached_key != key or not isinstance(app_cfg, AppConfig):
+        return None
+    return app_cfg
+
+
+def _write_cached_config(cache_path: str, key: tuple, app_cfg: AppConfig) -> None:
+    tmp = cache_path + ".tmp"
+    try:
+        # Holds the same secrets as the TOML file: keep it owner-only
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, app_cfg), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except Exception:
+        logger.debug("Could not write config cache %s", cache_path, exc_info=True)
+
+
+def _log_config_summary(app_cfg: AppConfig) -> None:
+    reddit, bot = app_cfg.reddit, app_cfg.bot
+    # Safe summary for debugging (avoid logging secrets)
+    logger.info(
+        "Config loaded: subreddit=%s, cards_csv=%s, dry_run=%s, state_file=%s, max_cards_per_reply=%d, user_agent=%s, username=%s",
+        bot.subreddit,
+        bot.cards_csv,
+        bot.dry_run,
+        bot.state_file,
+        bot.max_cards_per_reply,
+        reddit.user_agent,
+        _redact(reddit.username),
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Reddit credentials present: client_id=%s, client_secret=%s, password=%s",
+            _redact(reddit.client_id),
+            _redact(reddit.client_secret),
+            _redact(reddit.password),
+        )
+
+
 def load_config(path: str | None = None) -> AppConfig:
     """
     Load config from a TOML file (default: ./config.toml).
+
+    The parsed config is cached next to the file as "<path>.pkl" and reused
+    until the TOML file's mtime or size changes.
     """
     env_path = os.environ.get("TMARS_BOT_CONFIG")
     cfg_path = path or env_path or "config.toml"
@@ -57,6 +128,19 @@ def load_config(path: str | None = None) -> AppConfig:
     else:
         logger.debug("Loading config from default path: %s", cfg_path)
 
+    cache_path = cfg_path + ".pkl"
+    try:
+        key = _cache_key(os.stat(cfg_path))
+    except OSError:
+        key = None
+    if key is not None:
+        cached = _read_cached_config(cache_path, key)
+        if cached is not None:
+            logger.debug("Using cached config from %s", cache_path)
+            _log_config_summary(cached)
+            return cached
+
+    import tomllib  # only needed when the cache is missing or stale
     try:
         with open(cfg_path, "rb") as f:
             data = tomllib.load(f)
@@ -103,22 +187,8 @@ def load_config(path: str | None = None) -> AppConfig:
         logger.exception("Invalid type for one of the 'bot' fields in config")
         raise
 
-    # Safe summary for debugging (avoid logging secrets)
-    logger.info(
-        "Config loaded: subreddit=%s, cards_csv=%s, dry_run=%s, state_file=%s, max_cards_per_reply=%d, user_agent=%s, username=%s",
-        bot.subreddit,
-        bot.cards_csv,
-        bot.dry_run,
-        bot.state_file,
-        bot.max_cards_per_reply,
-        reddit.user_agent,
-        _redact(reddit.username),
-    )
-    logger.debug(
-        "Reddit credentials present: client_id=%s, client_secret=%s, password=%s",
-        _redact(reddit.client_id),
-        _redact(reddit.client_secret),
-        _redact(reddit.password),
-    )
-
-    return AppConfig(reddit=reddit, bot=bot)
+    app_cfg = AppConfig(reddit=reddit, bot=bot)
+    _log_config_summary(app_cfg)
+    if key is not None:
+        _write_cached_config(cache_path, key, app_cfg)
+    return app_cfg
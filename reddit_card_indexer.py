@@ -10,11 +10,8 @@ def main():
     index = CardIndex.build(cards)
 
     reddit = make_reddit(cfg)
-
-    def lookup_fn(token: str):
-        return index.lookup(token)
-
-    run_stream(reddit, cfg, lookup_fn)
+    # The bound method is the lookup_fn itself; no wrapper frame per token
+    run_stream(reddit, cfg, index.lookup)
 
 
 if __name__ == "__main__":
@@ -1,40 +1,63 @@
-import json
+from __future__ import annotations
+
+import atexit
+import os
 import re
+import signal
+import sqlite3
 import time
 import logging
+from collections import deque
 from pathlib import Path
-from typing import Set, Iterable, Optional
-
-import praw
-from praw.exceptions import RedditAPIException, APIException  # APIException items live in RedditAPIException.items
-from prawcore.exceptions import (
-    PrawcoreException,
-    Forbidden,
-    NotFound,
-    BadRequest,
-    OAuthException,
-    InsufficientScope,
-    ServerError,
-    RequestException,
-    ResponseException,
-)
+from typing import TYPE_CHECKING, Callable, Deque, List, Set, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import praw
+    from praw.exceptions import RedditAPIException
 
 from alias_extraction_and_card_resolution import resolve_cards_for_comment, format_card_reply
+from card_data_model import Card
 from reddit_bot_config_loader import AppConfig
 
-# Enable DEBUG logging globally for the app
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+# Log level from TMARS_LOG_LEVEL (default INFO); DEBUG logs every streamed comment
+LOG_LEVEL = os.environ.get("TMARS_LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# Processed IDs are appended to the state file in batches of this many
+STATE_FLUSH_EVERY = 32
+# Punctuation of the older JSON state formats; IDs are base-36, so blanking
+# these out leaves just the IDs
+_JSON_PUNCT = str.maketrans('[],"', "    ")
+# state_file suffixes that select the SQLite-backed store
+_SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+# Pause before retrying a reply that hit a server/network error
+_TRANSIENT_BACKOFF_S = 5
+# "... try again in 9 minutes." in RATELIMIT API errors
+_RATELIMIT_RE = re.compile(r"(\d+)\s*(second|minute)", re.IGNORECASE)
+# Case-insensitive search, so the comment body is never lowercased (copied);
+# also accepts "opt-out", "opt_out" and "opt out", as whole words only
+_OPTOUT_RE = re.compile(r"\bopt[-_ ]?out\b", re.IGNORECASE)
+
 
 class StateStore:
     """
     Persist IDs of comments we already replied to (to avoid duplicates).
+
+    On disk this is plain text, one ID per line. New IDs are buffered and
+    written every STATE_FLUSH_EVERY adds (and on save()/close()/exit) as one
+    os.write() on a persistent O_APPEND descriptor, so the comment loop isn't
+    paying an open() or a write per comment.
+    Files in the older JSON formats are converted on first load.
     """
     def __init__(self, path: str):
         self._path = Path(path)
         self._ids: Set[str] = set()
+        self._fd: Optional[int] = None
+        self._pending: List[str] = []
         self._loaded = False
+        atexit.register(self.close)
 
     def load(self) -> None:
         if self._loaded:
@@ -42,10 +65,13 @@ class StateStore:
         self._loaded = True
         if self._path.exists():
             try:
-                with self._path.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        self._ids = set(map(str, data))
+                text = self._path.read_text(encoding="utf-8")
+                legacy = text.lstrip().startswith(("[", '"'))
+                if legacy:
+                    text = text.translate(_JSON_PUNCT)
+                self._ids = set(text.split())
+                if legacy:
+                    self.compact()
                 logger.debug("Loaded %d processed comment IDs from %s", len(self._ids), self._path)
             except Exception as e:
                 # start fresh on error
@@ -56,26 +82,181 @@ class StateStore:
             self._path.parent.mkdir(parents=True, exist_ok=True)
             logger.debug("State file %s does not exist; created parent directory %s", self._path, self._path.parent)
 
+    def _open_fd(self) -> int:
+        # Opened on first write, and again after compact() replaced the file
+        if self._fd is None:
+            self._fd = os.open(str(self._path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        return self._fd
+
     def save(self) -> None:
+        """
+        Append IDs added since the last save to the state file.
+        """
+        if not self._pending:
+            return
         try:
-            with self._path.open("w", encoding="utf-8") as f:
-                json.dump(sorted(self._ids), f, indent=2)
+            # O_APPEND makes the whole batch one atomic append
+            os.write(self._open_fd(), "".join(cid + "\n" for cid in self._pending).encode("utf-8"))
+            logger.debug("Appended %d processed comment IDs to %s", len(self._pending), self._path)
+            self._pending.clear()
+        except Exception:
+            logger.exception("Failed to save state to %s", self._path)
+
+    def compact(self) -> None:
+        """
+        Rewrite the whole file from memory (used for the legacy conversion).
+        """
+        self.close()
+        self._pending.clear()  # the rewrite below includes them
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        try:
+            tmp.write_text("".join(cid + "\n" for cid in self._ids), encoding="utf-8")
+            tmp.replace(self._path)
             logger.debug("Saved %d processed comment IDs to %s", len(self._ids), self._path)
         except Exception:
             logger.exception("Failed to save state to %s", self._path)
 
+    def close(self) -> None:
+        self.save()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # has/add/in assume load() was called once up front (run_stream does)
+    def __contains__(self, comment_id: str) -> bool:
+        return comment_id in self._ids
+
     def has(self, comment_id: str) -> bool:
-        self.load()
         return comment_id in self._ids
 
     def add(self, comment_id: str) -> None:
-        self.load()
+        self.try_claim(comment_id)
+
+    def release(self, comment_ids: Iterable[str]) -> None:
+        """
+        Forget claimed IDs whose comments were not handled after all.
+        """
+        released = set(comment_ids) & self._ids
+        if not released:
+            return
+        self._ids -= released
+        buffered = [cid for cid in self._pending if cid not in released]
+        if len(released) == len(self._pending) - len(buffered):
+            self._pending = buffered  # none reached the file yet
+        else:
+            self.compact()  # some were appended already; rewrite without them
+
+    def try_claim(self, comment_id: str) -> bool:
+        """
+        Record the ID; True if it was new, False if it was already processed.
+        """
+        if comment_id in self._ids:
+            return False  # already on disk; keeps the append-only file free of duplicates
         self._ids.add(comment_id)
-        self.save()
+        self._pending.append(comment_id)
+        if len(self._pending) >= STATE_FLUSH_EVERY:
+            self.save()
+        return True
+
+
+class SqliteStateStore:
+    """
+    StateStore variant backed by a key-only SQLite table, for very long
+    histories: IDs live in an on-disk B-tree instead of an in-memory set,
+    and every add is a single autocommitted INSERT (WAL journal), so there
+    is nothing to buffer or flush.
+    """
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._db: Optional[sqlite3.Connection] = None
+        # Opened here so the store is usable without a separate load() call
+        self.load()
+        atexit.register(self.close)
+
+    def load(self) -> None:
+        """
+        Open the database (again, if close() was called); no-op when open.
+        """
+        if self._db is not None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self._path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY) WITHOUT ROWID")
+        logger.debug("Opened SQLite state store %s", self._path)
+
+    def save(self) -> None:
+        pass  # every add is already committed
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError(f"SQLite state store {self._path} is closed")
+        return self._db
+
+    def __contains__(self, comment_id: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM seen WHERE id = ? LIMIT 1", (comment_id,)).fetchone() is not None
+
+    def has(self, comment_id: str) -> bool:
+        return comment_id in self
+
+    def add(self, comment_id: str) -> None:
+        self.try_claim(comment_id)
+
+    def release(self, comment_ids: Iterable[str]) -> None:
+        """
+        Forget claimed IDs whose comments were not handled after all.
+        """
+        try:
+            self._conn().executemany("DELETE FROM seen WHERE id = ?", ((cid,) for cid in comment_ids))
+        except sqlite3.Error:
+            logger.exception("Failed to release comment IDs in %s", self._path)
+
+    def try_claim(self, comment_id: str) -> bool:
+        """
+        Record the ID; True if it was new, False if it was already processed.
+        """
+        try:
+            cur = self._conn().execute("INSERT OR IGNORE INTO seen VALUES (?)", (comment_id,))
+        except sqlite3.Error:
+            logger.exception("Failed to record comment ID %s in %s", comment_id, self._path)
+            return True  # process it anyway rather than silently dropping it
+        return cur.rowcount == 1
+
+
+def open_state_store(path: str):
+    """
+    SQLite store for *.sqlite/*.sqlite3/*.db paths, plain-text StateStore otherwise.
+    """
+    if path.lower().endswith(_SQLITE_SUFFIXES):
+        return SqliteStateStore(path)
+    return StateStore(path)
+
+
+def _author_name(comment) -> str:
+    # author is None for deleted accounts
+    return str(comment.author or "") or "<deleted>"
 
 
 def make_reddit(cfg: AppConfig) -> praw.Reddit:
     # Note: Avoid passing unsupported kwargs to praw.Reddit to prevent TypeError.
+    # praw pulls in requests/urllib3/TLS; import it only when a client is needed
+    import praw
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    # One keep-alive pool for every request, so replies after a backoff reuse
+    # the TLS connection. The client is single-threaded, so a couple of
+    # connections is plenty; retries are left to prawcore.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+    session.mount("https://", adapter)
+
     logger.debug("Creating Reddit client for subreddit=%s user_agent=%s", cfg.bot.subreddit, cfg.reddit.user_agent)
     return praw.Reddit(
         client_id=cfg.reddit.client_id,
@@ -83,6 +264,7 @@ def make_reddit(cfg: AppConfig) -> praw.Reddit:
         username=cfg.reddit.username,
         password=cfg.reddit.password,
         user_agent=cfg.reddit.user_agent,
+        requestor_kwargs={"session": session},
     )
 
 
@@ -94,10 +276,10 @@ def _parse_rate_limit_delay(ex: RedditAPIException) -> int:
     delay_seconds = 60  # default backoff
     try:
         for item in getattr(ex, "items", []) or []:
-            # item is praw.exceptions.APIException
-            if isinstance(item, APIException) and str(item.error_type).upper() == "RATELIMIT":
+            # items are praw.exceptions.APIException; error_type is already upper-case
+            if getattr(item, "error_type", None) == "RATELIMIT":
                 msg = item.message or ""
-                m = re.search(r"(\d+)\s*(second|minute)", msg, flags=re.IGNORECASE)
+                m = _RATELIMIT_RE.search(msg)
                 if m:
                     value = int(m.group(1))
                     unit = m.group(2).lower()
@@ -116,11 +298,26 @@ def _parse_rate_limit_delay(ex: RedditAPIException) -> int:
 def run_stream(
     reddit: praw.Reddit,
     cfg: AppConfig,
-    lookup_fn,
+    lookup_fn: Callable[[str], Optional[Card]],
 ) -> None:
     """
     Stream subreddit comments and reply when aliases are detected.
+    lookup_fn resolves one alias token to a Card (e.g. a bound CardIndex.lookup).
     """
+    from praw.exceptions import RedditAPIException
+    from praw.models.util import ExponentialCounter
+    from prawcore.exceptions import (
+        PrawcoreException,
+        Forbidden,
+        NotFound,
+        BadRequest,
+        OAuthException,
+        InsufficientScope,
+        ServerError,
+        RequestException,
+        ResponseException,
+    )
+
     logger.info("Starting comment stream on r/%s (dry_run=%s)", cfg.bot.subreddit, cfg.bot.dry_run)
     subreddit = reddit.subreddit(cfg.bot.subreddit)
     me = None
@@ -131,73 +328,129 @@ def run_stream(
         logger.exception("Unable to fetch authenticated user; proceeding without self-filter")
         me = None
 
-    state = StateStore(cfg.bot.state_file)
+    state = open_state_store(cfg.bot.state_file)
     state.load()
 
-    for comment in subreddit.stream.comments(skip_existing=True):
-        try:
-            author_str = str(getattr(comment, "author", "") or "")
-            logger.debug("Processing comment id=%s by u/%s", comment.id, author_str or "<deleted>")
+    def _on_sigterm(signum, frame):
+        logger.info("Received SIGTERM; saving state and stopping stream.")
+        raise SystemExit(0)  # the finally below saves state
 
-            # Skip our own comments or already processed comments
-            if state.has(comment.id):
-                logger.debug("Skipping already processed comment id=%s", comment.id)
-                continue
+    signal.signal(signal.SIGTERM, _on_sigterm)
 
-            # Skip opt-out comments
-            body_text = getattr(comment, "body", "") or ""
-            if "optout" in (body_text.lower()):
-                logger.debug("Skipping comment id=%s due to opt-out", comment.id)
-                state.add(comment.id)
-                continue
+    # Loop-invariant settings and methods, bound once outside the hot loop
+    max_cards = cfg.bot.max_cards_per_reply
+    footer = cfg.bot.reply_footer
+    dry_run = cfg.bot.dry_run
+    claim = state.try_claim
 
-            cards = resolve_cards_for_comment(body_text, lookup_fn)
-            if not cards:
-                logger.debug("No cards resolved for comment id=%s", comment.id)
-                state.add(comment.id)
-                continue
+    # Replies held back by a RATELIMIT: (comment, reply_text, already_attempted),
+    # oldest first. The stream keeps being consumed while they wait instead of
+    # the whole loop sleeping through the backoff.
+    pending: Deque[Tuple[object, str, bool]] = deque()
+    blocked_until = 0.0
 
-            if len(cards) > cfg.bot.max_cards_per_reply:
-                logger.debug("Truncating cards from %d to %d for comment id=%s",
-                             len(cards), cfg.bot.max_cards_per_reply, comment.id)
-                cards = cards[: cfg.bot.max_cards_per_reply]
+    def _reply(comment, reply_text: str, attempted: bool) -> None:
+        nonlocal blocked_until
+        cid = comment.id
+        try:
+            comment.reply(reply_text)
+            logger.debug("Successfully replied to comment id=%s%s", cid, " after retry" if attempted else "")
+        except RedditAPIException as e:
+            if attempted:
+                logger.exception("Giving up on comment id=%s after retry due to non-retriable/duplicate API error", cid)
+            else:
+                delay = _parse_rate_limit_delay(e)
+                logger.warning("RedditAPIException on reply to comment id=%s; retrying in %d seconds", cid, delay, exc_info=True)
+                blocked_until = time.monotonic() + delay
+                pending.appendleft((comment, reply_text, True))
+        except (Forbidden, NotFound, BadRequest, OAuthException, InsufficientScope):
+            logger.exception("Permission/auth/resource error; cannot reply to comment id=%s", cid)
+        except (ServerError, RequestException, ResponseException, PrawcoreException):
+            # Back off like a RATELIMIT instead of sleeping in the loop
+            blocked_until = time.monotonic() + _TRANSIENT_BACKOFF_S
+            if attempted:
+                logger.exception("Transient backend/network error on retry; giving up on comment id=%s", cid)
+            else:
+                logger.warning("Transient backend/network error on reply to comment id=%s; retrying in %d seconds",
+                               cid, _TRANSIENT_BACKOFF_S, exc_info=True)
+                pending.appendleft((comment, reply_text, True))
 
-            reply_text = format_card_reply(cards, footer=cfg.bot.reply_footer)
+    def _send_pending() -> None:
+        while pending and time.monotonic() >= blocked_until:
+            _reply(*pending.popleft())
 
-            if cfg.bot.dry_run:
-                logger.info("[DRY RUN] Would reply to comment id=%s by u/%s with %d cards",
-                            comment.id, author_str or "<deleted>", len(cards))
-                print(f"[DRY RUN] Would reply to comment {comment.id} by u/{comment.author}:\n{reply_text}\n")
-                state.add(comment.id)
-                continue
+    # pause_after=0 makes the stream yield None after every poll with no new
+    # comments instead of sleeping internally, so pending replies go out once
+    # their backoff ends even on a quiet subreddit. The idle sleep praw would
+    # have done is done here instead, cut short when a retry comes due.
+    idle = ExponentialCounter(max_counter=16)
 
-            # Try to reply with robust exception handling
+    try:
+        for comment in subreddit.stream.comments(skip_existing=True, pause_after=0):
             try:
-                logger.info("Replying to comment id=%s by u/%s with %d cards", comment.id, author_str or "<deleted>", len(cards))
-                comment.reply(reply_text)
-                logger.debug("Successfully replied to comment id=%s", comment.id)
-            except RedditAPIException as e:
-                logger.warning("RedditAPIException on reply to comment id=%s; attempting backoff and retry", comment.id, exc_info=True)
-                delay = _parse_rate_limit_delay(e)
-                time.sleep(delay)
-                try:
-                    comment.reply(reply_text)
-                    logger.debug("Successfully replied to comment id=%s after retry", comment.id)
-                except (RedditAPIException, Forbidden, NotFound, BadRequest, OAuthException, InsufficientScope):
-                    logger.exception("Giving up on comment id=%s after retry due to non-retriable/duplicate API error", comment.id)
-            except (Forbidden, NotFound, BadRequest, OAuthException, InsufficientScope):
-                logger.exception("Permission/auth/resource error; cannot reply to comment id=%s", comment.id)
-            except (ServerError, RequestException, ResponseException, PrawcoreException):
-                logger.exception("Transient backend/network error; skipping comment id=%s and continuing", comment.id)
-                time.sleep(5)
-
-            # Mark as processed regardless to avoid repeated attempts on problematic comments
-            state.add(comment.id)
-
-        except KeyboardInterrupt:
-            logger.info("Received KeyboardInterrupt; stopping stream.")
-            break
-        except Exception:
-            logger.exception("Unexpected error while processing a comment; sleeping briefly and continuing")
-            time.sleep(2)
-            continue
+                if comment is None:
+                    wait = idle.counter()
+                    if pending:
+                        wait = min(wait, max(0.0, blocked_until - time.monotonic()))
+                    time.sleep(wait)
+                    _send_pending()
+                    continue
+                idle.reset()
+                _send_pending()
+
+                cid = comment.id
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processing comment id=%s by u/%s", cid, _author_name(comment))
+
+                # Skip already processed comments. Claiming up front marks the
+                # comment as processed whatever happens next, so problematic
+                # comments are never attempted twice.
+                if not claim(cid):
+                    logger.debug("Skipping already processed comment id=%s", cid)
+                    continue
+
+                # Skip opt-out comments
+                body_text = comment.body or ""
+                if _OPTOUT_RE.search(body_text):
+                    logger.debug("Skipping comment id=%s due to opt-out", cid)
+                    continue
+
+                # Capped while resolving, so tokens past the limit are never looked up
+                cards = resolve_cards_for_comment(body_text, lookup_fn, max_cards=max_cards)
+                if not cards:
+                    logger.debug("No cards resolved for comment id=%s", cid)
+                    continue
+
+                reply_text = format_card_reply(cards, footer=footer)
+
+                if dry_run:
+                    logger.info("[DRY RUN] Would reply to comment id=%s by u/%s with %d cards",
+                                cid, _author_name(comment), len(cards))
+                    print(f"[DRY RUN] Would reply to comment {cid} by u/{comment.author}:\n{reply_text}\n")
+                    continue
+
+                if pending or time.monotonic() < blocked_until:
+                    # Still backing off: queue behind the earlier replies
+                    logger.info("Queueing reply to comment id=%s by u/%s with %d cards (%d pending)",
+                                cid, _author_name(comment), len(cards), len(pending))
+                    pending.append((comment, reply_text, False))
+                    continue
+
+                logger.info("Replying to comment id=%s by u/%s with %d cards", cid, _author_name(comment), len(cards))
+                _reply(comment, reply_text, False)
+
+            except KeyboardInterrupt:
+                logger.info("Received KeyboardInterrupt; stopping stream.")
+                break
+            except Exception:
+                logger.exception("Unexpected error while processing a comment; sleeping briefly and continuing")
+                time.sleep(2)
+                continue
+    finally:
+        _send_pending()
+        if pending:
+            # Interrupted mid-backoff: don't record these as handled
+            logger.warning("Stopping with %d replies still backing off; releasing their IDs", len(pending))
+            state.release(c.id for c, _text, _attempted in pending)
+        # Buffered IDs must reach disk however the loop ends
+        state.save()